@@ -37,7 +37,6 @@ app = App(config=config)
 print(app.datasets.get_names())
 
 dataset = app.read_dataset("DY Jets")
-print(dataset.name, dataset.count())
 print(dataset.columns)
 print (dataset.columns_with_types)
 
@@ -58,5 +57,6 @@ slim = dataset.select_columns(["nElectron",
                                "Muon_pdgId",
                                "Muon_pfRelIso04_all"])
 
-
-print(slim.show())
+# Count and show the slimmed events with a single read of the files. The
+# slimmed dataset stays cached for any further work
+slim.summary(cache=True)
@@ -80,7 +80,7 @@ slim = dataset.select_columns(["nElectron",
                                "Muon_mass",
                                "Muon_tightId",
                                "Muon_pdgId",
-                               "Muon_pfRelIso04_all"])
+                               "Muon_pfRelIso04_all"]).cache()
 
 print(slim.count())
 print(slim.columns)
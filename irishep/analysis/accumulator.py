@@ -26,10 +26,38 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import math
+
 from pyspark.accumulators import AccumulatorParam
 from abc import ABCMeta
 
 
+def _combine(val1, val2):
+    """
+    Add val2 into val1. Has special case for the first time when the existing
+    value may be None. In that case just return the new value. Dictionaries
+    of histograms are merged key by key. Otherwise add the new value to the
+    existing histogram. For numpy arrays and histogram objects += updates
+    the existing storage without allocating a new one.
+    This is a module level function so that passing it to spark doesn't
+    serialize an Accumulator (and its registered spark accumulator) into
+    every task
+    :param val1: Existing value, or None
+    :param val2: Value to add
+    :return: The combined value
+    """
+    if val1 is None:
+        return val2
+
+    if isinstance(val1, dict):
+        for key, value in val2.items():
+            val1[key] = _combine(val1.get(key), value)
+    else:
+        val1 += val2
+
+    return val1
+
+
 class Accumulator(AccumulatorParam, metaclass=ABCMeta):
     def __init__(self, app):
         self.accumulator = app.executor.register_accumulator(None, self)
@@ -47,15 +75,27 @@ class Accumulator(AccumulatorParam, metaclass=ABCMeta):
         """
         Implements addInPlace for accumulator. Has special case for the first
         time when the existing value may be None. In that case just set the
-        accumulator to the passed in new value. Otherwise add the passed in
-        value to the existing histogram
+        accumulator to the passed in new value. Dictionaries of histograms
+        are merged key by key. Otherwise add the passed in value to the
+        existing histogram
         :param val1:
         :param val2:
         :return:
         """
-        if val1:
-            val1 += val2
-        else:
-            val1 = val2
+        return _combine(val1, val2)
 
-        return val1
+    def merge(self, rdd):
+        """
+        Combine an RDD of partial results (typically one histogram per
+        partition) with a multi-level tree reduce. This spreads the merging
+        across the executors instead of sending every partial result to the
+        driver as happens with the spark accumulator. The depth of the tree
+        grows with the log of the number of partitions.
+        The combine function doesn't reference this accumulator, so its
+        current value isn't shipped to (and reported back from) the tasks
+        :param rdd: RDD of values that can be combined with addInPlace
+        :return: The combined value
+        """
+        num_partitions = max(rdd.getNumPartitions(), 2)
+        depth = max(2, int(math.ceil(math.log2(num_partitions))))
+        return rdd.treeReduce(_combine, depth=depth)
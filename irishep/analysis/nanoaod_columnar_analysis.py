@@ -95,6 +95,7 @@ class NanoAODColumnarAnalysis(ColumnarAnalysis):
         udf_str = template.render(physics_objects=objects,
                                   counts=counts,
                                   cols=dataset.udf_arguments(physics_objects),
+                                  dataset_name=dataset.name,
                                   return_expr=return_expr)
 
         print(udf_str)
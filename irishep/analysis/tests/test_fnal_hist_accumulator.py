@@ -2,6 +2,8 @@ import unittest
 from unittest.mock import Mock
 
 import fnal_column_analysis_tools.hist as hist
+import numpy as np
+from irishep.analysis.accumulator import _combine
 from irishep.analysis.fnal_hist_accumulator import FnalHistAccumulator
 from irishep.app import App
 from irishep.executors.executor import Executor
@@ -47,6 +49,46 @@ class TestFNALHistAccumulator(unittest.TestCase):
         result = accum.addInPlace(2, 1)
         self.assertEqual(result, 3)
 
+    def test_add_in_place_numpy(self):
+        accum = self._create_fnal_accumulator()
+        val1 = np.array([1.0, 2.0, 3.0])
+        result = accum.addInPlace(val1, np.array([1.0, 1.0, 1.0]))
+        self.assertIs(result, val1)
+        np.testing.assert_array_equal(result, [2.0, 3.0, 4.0])
+
+    def test_add_in_place_dict(self):
+        accum = self._create_fnal_accumulator()
+        val1 = {"a": np.array([1, 2]), "b": np.array([3, 4])}
+        result = accum.addInPlace(val1, {"a": np.array([1, 1]),
+                                         "c": np.array([5, 6])})
+        self.assertIs(result, val1)
+        np.testing.assert_array_equal(result["a"], [2, 3])
+        np.testing.assert_array_equal(result["b"], [3, 4])
+        np.testing.assert_array_equal(result["c"], [5, 6])
+
+    def test_merge(self):
+        accum = self._create_fnal_accumulator()
+        mock_rdd = Mock()
+        mock_rdd.getNumPartitions = Mock(return_value=100)
+        mock_rdd.treeReduce = Mock(return_value=42)
+
+        result = accum.merge(mock_rdd)
+        self.assertEqual(result, 42)
+        mock_rdd.treeReduce.assert_called_with(_combine, depth=7)
+
+        # The combine function must not carry the accumulator to the tasks
+        combine_func = mock_rdd.treeReduce.call_args[0][0]
+        self.assertFalse(hasattr(combine_func, "__self__"))
+
+    def test_merge_few_partitions(self):
+        accum = self._create_fnal_accumulator()
+        mock_rdd = Mock()
+        mock_rdd.getNumPartitions = Mock(return_value=1)
+        mock_rdd.treeReduce = Mock(return_value=42)
+
+        accum.merge(mock_rdd)
+        mock_rdd.treeReduce.assert_called_with(_combine, depth=2)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -38,6 +38,7 @@ from irishep.datasets.dataset import Dataset
 class TestNanoAODColumnarAnalysis(unittest.TestCase):
     def test_render(self):
         mock_dataset = Mock(Dataset)
+        mock_dataset.name = "my dataset"
         mock_dataset.columns = ["dataset", "run", "luminosityBlock", "event",
                                 "nElectron,", "Electron_pt", "Electron_eta",
                                 "nMuon", "Muon_pt", "Muon_eta"]
@@ -48,7 +49,7 @@ class TestNanoAODColumnarAnalysis(unittest.TestCase):
         mock_dataset.count_column_for_physics_object = Mock(
             side_effect=["nElectrons", "nMuons"])
         mock_dataset.udf_arguments = Mock(
-            return_value=['dataset', 'nElectron', 'Electron_pt', 'Electron_eta',
+            return_value=['nElectron', 'Electron_pt', 'Electron_eta',
                           'nMuon', 'Muon_pt', 'Muon_eta'])
 
         mock_user_analysis = Mock(UserAnalysis)
@@ -69,9 +70,10 @@ class TestNanoAODColumnarAnalysis(unittest.TestCase):
         analysis.env.get_template.assert_called_with("mytemplate.py")
 
         mock_template.render.assert_called_with(
-            cols=['dataset', 'nElectron', 'Electron_pt', 'Electron_eta',
+            cols=['nElectron', 'Electron_pt', 'Electron_eta',
                   'nMuon',
                   'Muon_pt', 'Muon_eta'],
+            dataset_name="my dataset",
             physics_objects={'Electron': [
                 {'physics_obj_property': 'pt', 'col': 'Electron_pt'},
                 {'physics_obj_property': 'eta', 'col': 'Electron_eta'}
@@ -25,6 +25,14 @@
 # CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from irishep.datasets.dataset import Dataset
+
+# Aim for partitions about the size of an HDFS block
+TARGET_PARTITION_BYTES = 128 << 20
 
 
 class App:
@@ -43,16 +51,64 @@ class App:
             self.dataset_manager.provision(self)
         return self.dataset_manager
 
-    def read_dataset(self, dataset_name):
+    def read_dataset(self, dataset_name, columns=None):
         """
         Creates a dataset from files on disk. For now assumes that the files are
         in ROOT format
         :param dataset_name: Name of the dataset to read. Gets filenames from
             the dataset_manager
+        :param columns: Optional list of column names. If provided only these
+            branches (along with the technical columns) are read from the files
         :return: A populated Dataset instance
         """
         files = self.datasets.get_file_list(dataset_name)
         print(files)
 
-        dataset = self.executor.read_files(dataset_name, files)
+        # An explicit partition count in the config wins, then the
+        # executor's own. Only pick one from the file sizes if neither is set
+        num_partitions = self.config.num_partitions
+        if num_partitions is None and self.executor.num_partitions is None:
+            num_partitions = self._partitions_for_files(files)
+
+        branches = None
+        if columns is not None:
+            # The dataset column is created by the dataset, not read from file
+            technical_branches = [col for col in Dataset.technical_columns
+                                  if col != "dataset"]
+            branches = list(
+                OrderedDict.fromkeys(list(columns) + technical_branches))
+
+        dataset = self.executor.read_files(dataset_name, files,
+                                           num_partitions=num_partitions,
+                                           branches=branches)
         return dataset
+
+    @staticmethod
+    def _local_path(file):
+        """
+        Convert a file path or file: URI into a local filesystem path
+        :param file: File path or URI
+        :return: Local path, or None if the file is on a remote filesystem
+        """
+        parsed = urlparse(file)
+        if parsed.scheme == "file":
+            return parsed.path
+        elif parsed.scheme == "":
+            return file
+        return None
+
+    @staticmethod
+    def _partitions_for_files(files):
+        """
+        Choose a number of partitions so each one holds about
+        TARGET_PARTITION_BYTES of the input files.
+        :param files: List of file paths or file: URIs
+        :return: Number of partitions, or None if the size of the files can't
+            be determined (i.e. remote files)
+        """
+        paths = [App._local_path(f) for f in files]
+        if not all(path and os.path.isfile(path) for path in paths):
+            return None
+
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+        return max(1, total_bytes // TARGET_PARTITION_BYTES)
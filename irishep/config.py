@@ -37,13 +37,20 @@ class Config:
             Instance of dataset manager
         executor: Instance of executor where the analysis will be run
         num_partitions: Int, optional
-            Number of partitions to spread datasets over.
+            Number of partitions to spread datasets over. The number of
+            partitions used is, in order of precedence:
+            1. this value, if provided
+            2. the executor's num_partitions, if it has one
+            3. a count chosen from the size of the dataset's files so each
+               partition holds about 128 MB. If the files are remote their
+               size can't be determined and they keep the partitioning they
+               were read with.
     """
 
     def __init__(self,
                  dataset_manager=None,
                  executor=None,
-                 num_partitions=10):
+                 num_partitions=None):
         self.dataset_manager = dataset_manager
         self.executor = executor
         self.num_partitions = num_partitions
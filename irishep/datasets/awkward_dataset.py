@@ -85,7 +85,7 @@ class AwkwardDataset(Dataset):
         return [(col_name, self._type_for_col(col_name)) for col_name in
                 self.columns]
 
-    def show(self):
+    def show(self, n=20):
         pass
 
     def repartition(self, num_partitions):
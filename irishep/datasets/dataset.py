@@ -27,12 +27,12 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 
-import re
-
 from abc import ABCMeta, abstractmethod
 
 
 class Dataset(metaclass=ABCMeta):
+    # Identifying columns that are always included in a projected dataset
+    technical_columns = ["dataset", "run", "luminosityBlock", "event"]
 
     def __init__(self, name):
         self.name = name
@@ -44,6 +44,16 @@ class Dataset(metaclass=ABCMeta):
         :return:
         """
 
+    def count_approx(self, timeout_ms=2000, confidence=0.95):
+        """
+        Estimate the number of events in the dataset. Implementations that
+        can't produce a cheaper estimate just return the exact count
+        :param timeout_ms: Maximum time to wait in milliseconds
+        :param confidence: Desired statistical confidence of the estimate
+        :return: Approximate number of events
+        """
+        return self.count()
+
     @property
     @abstractmethod
     def columns(self):
@@ -69,23 +79,19 @@ class Dataset(metaclass=ABCMeta):
         :return: list of columns
         """
         # Create column Names for the count properties (nElectrons, nMuons, etc)
-        physics_obj_count_cols = ["n" + col for col in physics_objects]
+        physics_obj_count_cols = tuple(
+            self.count_column_for_physics_object(obj)
+            for obj in physics_objects)
 
-        # Join together into a series of alternate REs
-        physics_obj_count_re = "(" + ")|(".join(physics_obj_count_cols) + ")"
-
-        # Create an RE that will match a physics object's properties
-        # i.e. Electon_.*
-        physics_obj_re = "(" + ")|(".join(physics_objects) + ")_.*"
-
-        # Now create a composite RE that will match a count or a
-        # physics obj property
-        r = re.compile(
-            "(" + physics_obj_re + ")|(" + physics_obj_count_re + ")")
+        # Physics object properties are named like Electron_pt so we can
+        # look up the prefix before the first underscore directly
+        physics_obj_set = set(physics_objects)
 
         # Filter and return list
         # noinspection PyTypeChecker
-        return [col for col in self.columns if r.match(col)]
+        return [col for col in self.columns
+                if col.split("_", 1)[0] in physics_obj_set or
+                col.startswith(physics_obj_count_cols)]
 
     @staticmethod
     def count_column_for_physics_object(physics_object):
@@ -109,22 +115,50 @@ class Dataset(metaclass=ABCMeta):
         :return: New dataframe with only the requested columns
         """
 
+    def cache(self):
+        """
+        Keep the dataset's data around after it is first computed so that
+        subsequent operations don't have to read the files again. Datasets
+        that already hold their data in memory just return themselves
+        :return: This dataset
+        """
+        return self
+
     def udf_arguments(self, physics_objects):
         """
         Construct the set of argumnents to UDFs on this dataset based on the
         requested Physics Objects.
-        For now we also include the dataset name column for bookkeeping
+        The dataset name is the same for every event, so it is rendered into
+        the UDF rather than passed in as a column
         :param physics_objects: List of physics object names
         :return: List of colums for passing in as arguments to UDF
         """
-        return ["dataset"]+self.columns_for_physics_objects(physics_objects)
+        return self.columns_for_physics_objects(physics_objects)
 
     @abstractmethod
-    def show(self):
+    def show(self, n=20):
         """
         Print out a friendly representation of the dataframe
+        :param n: Number of events to show
+        :return: None
+        """
+
+    def summary(self, n=20, cache=False):
+        """
+        Print out the number of events followed by a friendly representation
+        of the first few of them.
+        Without caching the files are read once for the count and again for
+        the events. With cache=True the files are only read once, but the
+        dataset stays persisted afterwards with every column it holds, so
+        only ask for it on a slimmed dataset you are going to keep using
+        :param n: Number of events to show
+        :param cache: Cache the dataset before counting
         :return: None
         """
+        if cache:
+            self.cache()
+        print(self.name, self.count())
+        self.show(n)
 
     @abstractmethod
     def repartition(self, num_partitions):
@@ -26,86 +26,188 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 # noinspection PyUnresolvedReferences
+from pyspark import StorageLevel
 from pyspark.sql.functions import lit, pandas_udf, PandasUDFType
 from pyspark.sql.types import DoubleType
 
 from irishep.datasets.dataset import Dataset
 
 
-class SparkDataset(Dataset):
-    # There is no support in arrow for certain datatypes. Avoid exceptions by
-    # casting the column to a supported datatype
-    pyarrow_column_coverters = {
-        "array<boolean>": lambda col: col.cast("array<int >")
-    }
-
-    def _pyarrow_compatble_column(self, col, col_type):
-        """
-        Convert the colummn into a cast statement if the column's type is not
-        supported by pyArrow
-        :param col: Column Object
-        :param col_type: Type name as a string
-        :return: Column, or casted column
-        """
-        if col_type in self.pyarrow_column_coverters:
-            return self.pyarrow_column_coverters[col_type](col)
-        else:
-            return col
+def _maybe_cast(col_name, col_type):
+    """
+    Build a SQL expression for the column. There is no support in arrow for
+    certain datatypes. Avoid exceptions by casting the column to a supported
+    datatype
+    :param col_name: Name of the column
+    :param col_type: Type name as a string
+    :return: Column expression string, or cast expression string
+    """
+    if col_type == "array<boolean>":
+        return "CAST(`%s` AS array<int>) AS `%s`" % (col_name, col_name)
+    return "`%s`" % col_name
+
+
+def _dataset_literal(name):
+    """
+    Build a SQL expression for a constant column holding the dataset name
+    :param name: Name of the dataset
+    :return: Expression string
+    """
+    escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+    return "'%s' AS `dataset`" % escaped
+
 
-    def __init__(self, name, dataframe):
+class SparkDataset(Dataset):
+    def __init__(self, name, dataframe, add_dataset_col=True,
+                 num_partitions=None):
+        """
+        Wrap a spark dataframe as a dataset
+        :param name: Name of the dataset
+        :param dataframe: Spark dataframe holding the events
+        :param add_dataset_col: If True, add a constant column holding the
+            dataset name when the dataframe doesn't already have one. If
+            False the dataframe is left as is. When it has no dataset column,
+            select_columns adds the name as a literal in its projection
+        :param num_partitions: Number of partitions the dataframe is spread
+            over, if known
+        """
         super().__init__(name)
+        self.num_partitions = num_partitions
+        self._count = None
+        self._columns = None
+        self._columns_with_types = None
 
-        if 'dataset' not in dataframe.columns:
+        if add_dataset_col and 'dataset' not in dataframe.columns:
             self.dataframe = dataframe.withColumn("dataset", lit(name))
         else:
             self.dataframe = dataframe
 
     def count(self):
-        return self.dataframe.count()
+        """
+        Count the events in the dataset. This requires a full pass over the
+        data, so the result is remembered for subsequent calls
+        :return: Number of events
+        """
+        if self._count is None:
+            self._count = self.dataframe.count()
+        return self._count
+
+    def count_approx(self, timeout_ms=2000, confidence=0.95):
+        """
+        Estimate the number of events, returning whatever result is available
+        once the timeout expires.
+        The dataframe is projected down to no columns and counted on the JVM
+        side. Going through the python RDD (dataframe.rdd.countApprox) would
+        instead pickle every column of every row and, in pyspark 2.4, block
+        until the count is complete
+        :param timeout_ms: Maximum time to wait in milliseconds
+        :param confidence: Desired statistical confidence of the estimate
+        :return: Approximate number of events
+        """
+        if self._count is not None:
+            return self._count
+
+        partial_count = self.dataframe.select()._jdf.rdd().countApprox(
+            timeout_ms, confidence)
+        return int(round(partial_count.initialValue().mean()))
 
     @property
     def columns(self):
         """
-        Fetch the list of column names from the dataset
+        Fetch the list of column names from the dataset. The schema of the
+        dataframe doesn't change, so the result is remembered
         :return: List of string column names
         """
-        return self.dataframe.columns
+        if self._columns is None:
+            self._columns = self.dataframe.columns
+        return self._columns
 
     @property
     def columns_with_types(self):
         """
-        Fetch the list of column names along with their datatypes
+        Fetch the list of column names along with their datatypes. The schema
+        of the dataframe doesn't change, so the result is remembered
         :return: List of tuples with column name and datatype as string
         """
-        return self.dataframe.dtypes
+        if self._columns_with_types is None:
+            self._columns_with_types = self.dataframe.dtypes
+        return self._columns_with_types
 
     def select_columns(self, columns):
         """
         Create a new dataset object that contains only the specified columns.
         For techincal reasons there are some identifying columns that will
-        be included in the result even if they are not requested. Columns
+        be included in the result even if they are not requested, as long as
+        they exist in this dataset. Columns
         with a type that is not supported by pyarrow will be casted to a
-        supported type
+        supported type. If the number of partitions is known, the result is
+        coalesced into fewer partitions in proportion to the fraction of
+        columns kept, but no fewer than spark's default parallelism
         :param columns: List of column names
         :return: New dataframe with only the requested columns
         """
-        columns2 = set(columns).union(
-            ["dataset", "run", "luminosityBlock", "event"])
-
-        projected = self.dataframe.select(list(columns2))
-
-        columns3 = [self._pyarrow_compatble_column(projected[c[0]], c[1]) for c
-                    in projected.dtypes]
-
+        col_types = dict(self.columns_with_types)
+
+        # Only add the technical columns this dataframe actually has. The
+        # dataset column can always be created from the dataset's name
+        technical_columns = {col_name for col_name in self.technical_columns
+                             if col_name in col_types or col_name == "dataset"}
+        columns2 = set(columns) | technical_columns
+
+        # Build the projection, the casts and the dataset name column as
+        # strings so they become a single projection in one call to spark.
+        # Unknown columns are left in the projection so spark reports them
+        columns3 = [_dataset_literal(self.name)
+                    if col_name == "dataset" and col_name not in col_types
+                    else _maybe_cast(col_name, col_types.get(col_name))
+                    for col_name in columns2]
+
+        projected = self.dataframe.selectExpr(*columns3)
+
+        # Rows are much narrower after the projection. Merge partitions in
+        # proportion to the fraction of columns kept so they don't end up
+        # tiny. Coalescing doesn't require a shuffle, but everything
+        # downstream runs with the reduced number of tasks, so never go below
+        # the cluster's default parallelism
+        num_partitions = self.num_partitions
+        if num_partitions:
+            min_partitions = self.dataframe.sql_ctx.sparkSession \
+                .sparkContext.defaultParallelism
+            target_partitions = max(
+                min_partitions,
+                int(num_partitions * len(columns3) / max(len(col_types), 1)))
+            if target_partitions < num_partitions:
+                projected = projected.coalesce(target_partitions)
+                num_partitions = target_partitions
+
+        # The dataset column is always part of the projection so there is no
+        # need to inspect the new dataframe for it
         return SparkDataset(name=self.name,
-                            dataframe=self.dataframe.select(list(columns3)))
+                            dataframe=projected,
+                            add_dataset_col=False,
+                            num_partitions=num_partitions)
+
+    def cache(self, storage_level=StorageLevel.MEMORY_AND_DISK):
+        """
+        Keep the dataframe around after it is first computed so that
+        subsequent actions don't have to read the files again. PySpark's
+        MEMORY_AND_DISK level stores the data serialized, which keeps the
+        memory footprint small
+        :param storage_level: Spark StorageLevel to persist the dataframe with
+        :return: This dataset
+        """
+        self.dataframe = self.dataframe.persist(storage_level)
+        return self
 
-    def show(self):
+    def show(self, n=20):
         """
-        Print out a friendly representation of the dataframe
+        Print out a friendly representation of the dataframe. Spark fetches
+        the rows with take, which only scans as many partitions as it needs
+        to find them
+        :param n: Number of events to show
         :return: None
         """
-        self.dataframe.show()
+        self.dataframe.show(n)
 
     def repartition(self, num_partitions):
         """
@@ -114,6 +216,7 @@ class SparkDataset(Dataset):
         :return: None
         """
         self.dataframe = self.dataframe.repartition(num_partitions)
+        self.num_partitions = num_partitions
 
     def execute_udf(self, user_func):
         zpeak_udf = pandas_udf(user_func.function, DoubleType(),
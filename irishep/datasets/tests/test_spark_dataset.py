@@ -1,6 +1,7 @@
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, PropertyMock
 import pyspark.sql
+from pyspark import StorageLevel
 from pyspark.sql.types import DoubleType
 from pyspark.sql.functions import PandasUDFType
 
@@ -17,11 +18,9 @@ class TestSparkDataset(unittest.TestCase):
             ('Electron_pt', 'string'),
             ('event', 'string'), ('luminosityBlock', 'string'),
             ("dataset", "string"), ('run', 'string')]
-
-        # Mock dataframe subscripting to get columns
-        mock_dataframe.__getitem__.side_effect = ['Electron_pt', 'dataset',
-                                                  'event', 'luminosityBlock',
-                                                  'run']
+        mock_dataframe.sql_ctx = MagicMock()
+        mock_dataframe.sql_ctx.sparkSession.sparkContext.defaultParallelism \
+            = 4
 
         return mock_dataframe
 
@@ -43,6 +42,14 @@ class TestSparkDataset(unittest.TestCase):
         self.assertEqual(a_dataset.name, "my dataset")
         self.assertEqual(a_dataset.dataframe, mock_dataframe)
 
+    def test_constuctor_without_dataset_col(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.columns = ['run', 'event']
+        a_dataset = SparkDataset("my dataset", mock_dataframe,
+                                 add_dataset_col=False)
+        self.assertEqual(a_dataset.dataframe, mock_dataframe)
+        mock_dataframe.withColumn.assert_not_called()
+
     def test_count(self):
         mock_dataframe = self._generate_mock_dataframe()
         mock_dataframe.count = Mock(return_value=42)
@@ -51,6 +58,41 @@ class TestSparkDataset(unittest.TestCase):
         self.assertEqual(42, count)
         mock_dataframe.count.assert_called_once()
 
+    def test_count_is_cached(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.count = Mock(return_value=42)
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+        self.assertEqual(42, a_dataset.count())
+        self.assertEqual(42, a_dataset.count())
+        mock_dataframe.count.assert_called_once()
+
+    def test_count_approx(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_empty_dataframe = MagicMock(pyspark.sql.DataFrame)
+        mock_empty_dataframe._jdf = MagicMock()
+        mock_jvm_count = mock_empty_dataframe._jdf.rdd().countApprox
+        mock_jvm_count().initialValue().mean.return_value = 40.2
+        mock_jvm_count.reset_mock()
+        mock_dataframe.select = Mock(return_value=mock_empty_dataframe)
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+
+        self.assertEqual(40, a_dataset.count_approx(1000))
+
+        # Count a dataframe with no columns on the JVM side. Going through the
+        # python rdd would pickle every row of the wide dataframe
+        mock_dataframe.select.assert_called_once_with()
+        mock_jvm_count.assert_called_with(1000, 0.95)
+        mock_dataframe.rdd.countApprox.assert_not_called()
+
+    def test_count_approx_after_count(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.count = Mock(return_value=42)
+        mock_dataframe.select = Mock()
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+        a_dataset.count()
+        self.assertEqual(42, a_dataset.count_approx())
+        mock_dataframe.select.assert_not_called()
+
     def test_columns(self):
         mock_dataframe = self._generate_mock_dataframe()
         mock_dataframe.columns = ['dataset', 'a', 'b', 'c']
@@ -58,6 +100,27 @@ class TestSparkDataset(unittest.TestCase):
         cols = a_dataset.columns
         self.assertEqual(cols, ['dataset', 'a', 'b', 'c'])
 
+    def test_columns_are_cached(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_columns = PropertyMock(return_value=['dataset', 'a'])
+        type(mock_dataframe).columns = mock_columns
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+        mock_columns.reset_mock()
+
+        self.assertEqual(a_dataset.columns, ['dataset', 'a'])
+        self.assertEqual(a_dataset.columns, ['dataset', 'a'])
+        mock_columns.assert_called_once()
+
+    def test_columns_with_types_are_cached(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dtypes = PropertyMock(return_value=[('a', 'int')])
+        type(mock_dataframe).dtypes = mock_dtypes
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+
+        self.assertEqual(a_dataset.columns_with_types, [('a', 'int')])
+        self.assertEqual(a_dataset.columns_with_types, [('a', 'int')])
+        mock_dtypes.assert_called_once()
+
     def test_columns_with_types(self):
         mock_dataframe = self._generate_mock_dataframe()
         mock_dataframe.dtypes = [('a', 'int'), ('b', 'string')]
@@ -87,7 +150,7 @@ class TestSparkDataset(unittest.TestCase):
     def test_select_provide_technical_fields(self):
         mock_dataframe = self._generate_mock_dataframe()
         mock_dataframe2 = self._generate_mock_dataframe()
-        mock_dataframe.select = Mock(return_value=mock_dataframe2)
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
 
         a_dataset = SparkDataset("my dataset", mock_dataframe)
 
@@ -97,11 +160,17 @@ class TestSparkDataset(unittest.TestCase):
         self.assertEqual(mock_dataframe2, a_dataset2.dataframe)
         self.assertEqual("my dataset", a_dataset2.name)
 
+        # The projection and casts should be done in a single step
+        mock_dataframe.selectExpr.assert_called_once()
+        mock_dataframe.select.assert_not_called()
+        mock_dataframe2.withColumn.assert_not_called()
+
         # The actual order of the selected columns is hard to predict. Use
         # sorted column names to test
-        call_args = mock_dataframe.select.call_args[0][0]
+        call_args = mock_dataframe.selectExpr.call_args[0]
         self.assertEqual(sorted(
-            ["dataset", "run", "luminosityBlock", "event", "Electron_pt"]),
+            ["`dataset`", "`run`", "`luminosityBlock`", "`event`",
+             "`Electron_pt`"]),
             sorted(call_args))
 
     # Given I included the technical fields in a select
@@ -111,7 +180,7 @@ class TestSparkDataset(unittest.TestCase):
     def test_select_non_arrow_type(self):
         mock_dataframe = self._generate_mock_dataframe()
         mock_dataframe2 = self._generate_mock_dataframe()
-        mock_dataframe2.dtypes = [
+        mock_dataframe.dtypes = [
             ('Muon_tightId', 'array<boolean>'),
             ('event', 'string'), ('luminosityBlock', 'string'),
             ("dataset", "string"), ('run', 'string')]
@@ -119,14 +188,7 @@ class TestSparkDataset(unittest.TestCase):
                                   'event', 'luminosityBlock',
                                   "dataset", 'run']
 
-        # Mock dataframe subscripting to get columns
-        muon_tight_id_mock = MagicMock()
-        mock_dataframe2.__getitem__.side_effect = [muon_tight_id_mock,
-                                                   'dataset',
-                                                   'event', 'luminosityBlock',
-                                                   'run']
-
-        mock_dataframe.select = Mock(return_value=mock_dataframe2)
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
 
         a_dataset = SparkDataset("my dataset", mock_dataframe)
 
@@ -136,7 +198,11 @@ class TestSparkDataset(unittest.TestCase):
         self.assertEqual(mock_dataframe2, a_dataset2.dataframe)
         self.assertEqual("my dataset", a_dataset2.name)
 
-        muon_tight_id_mock.cast.assert_called_with("array<int >")
+        call_args = mock_dataframe.selectExpr.call_args[0]
+        self.assertEqual(sorted(
+            ["CAST(`Muon_tightId` AS array<int>) AS `Muon_tightId`",
+             "`event`", "`luminosityBlock`", "`dataset`", "`run`"]),
+            sorted(call_args))
 
     # Given I did not inlude the technical fields in a select. When I perform
     # the select then I should see a dataframe that holds my fields plus the
@@ -144,12 +210,8 @@ class TestSparkDataset(unittest.TestCase):
     def test_select_without_technical_fields(self):
         mock_dataframe = self._generate_mock_dataframe()
         mock_dataframe2 = self._generate_mock_dataframe()
-        mock_dataframe2.dtypes = [
-            ('Electron_pt', 'string'),
-            ('event', 'string'), ('luminosityBlock', 'string'),
-            ("dataset", "string"), ('run', 'string')]
 
-        mock_dataframe.select = Mock(return_value=mock_dataframe2)
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
 
         a_dataset = SparkDataset("my dataset", mock_dataframe)
         a_dataset2 = a_dataset.select_columns(["Electron_pt"])
@@ -159,10 +221,104 @@ class TestSparkDataset(unittest.TestCase):
 
         # The actual order of the selected columns is hard to predict. Use
         # sorted column names to test
-        call_args = mock_dataframe.select.call_args[0][0]
+        call_args = mock_dataframe.selectExpr.call_args[0]
+        self.assertEqual(sorted(call_args),
+                         sorted(["`dataset`", "`run`", "`luminosityBlock`",
+                                 "`event`", "`Electron_pt`"]))
+
+    # Given a dataframe without the dataset column. When I perform a select
+    # then the dataset name should be added as part of the same projection
+    def test_select_adds_dataset_literal(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.dtypes = [
+            ('Electron_pt', 'string'),
+            ('event', 'string'), ('luminosityBlock', 'string'),
+            ('run', 'string')]
+        mock_dataframe.columns = ['Electron_pt', 'event', 'luminosityBlock',
+                                  'run']
+        mock_dataframe2 = self._generate_mock_dataframe()
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
+
+        a_dataset = SparkDataset("Bob's dataset", mock_dataframe,
+                                 add_dataset_col=False)
+        a_dataset.select_columns(["Electron_pt"])
+
+        call_args = mock_dataframe.selectExpr.call_args[0]
         self.assertEqual(sorted(call_args),
-                         sorted(["dataset", "run", "luminosityBlock", "event",
-                                 "Electron_pt"]))
+                         sorted(["'Bob\\'s dataset' AS `dataset`", "`run`",
+                                 "`luminosityBlock`", "`event`",
+                                 "`Electron_pt`"]))
+
+    # Given a dataframe that is missing some of the technical fields. When I
+    # perform a select then only the technical fields that exist are added
+    def test_select_missing_technical_fields(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.dtypes = [('Electron_pt', 'string'),
+                                 ("dataset", "string")]
+        mock_dataframe2 = self._generate_mock_dataframe()
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
+
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+        a_dataset.select_columns(["Electron_pt"])
+
+        call_args = mock_dataframe.selectExpr.call_args[0]
+        self.assertEqual(sorted(call_args),
+                         sorted(["`dataset`", "`Electron_pt`"]))
+
+    # Given a dataframe with many partitions. When I select a fraction of the
+    # columns then the result should be coalesced by the same fraction
+    def test_select_coalesces_partitions(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.dtypes = mock_dataframe.dtypes + [
+            ('Electron_eta', 'string'), ('Electron_phi', 'string'),
+            ('Muon_pt', 'string'), ('Muon_eta', 'string'),
+            ('Muon_phi', 'string')]
+        mock_dataframe2 = self._generate_mock_dataframe()
+        mock_dataframe3 = self._generate_mock_dataframe()
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
+        mock_dataframe2.coalesce = Mock(return_value=mock_dataframe3)
+
+        a_dataset = SparkDataset("my dataset", mock_dataframe,
+                                 num_partitions=100)
+        a_dataset2 = a_dataset.select_columns(["Electron_pt"])
+
+        mock_dataframe2.coalesce.assert_called_with(50)
+        self.assertEqual(mock_dataframe3, a_dataset2.dataframe)
+        self.assertEqual(50, a_dataset2.num_partitions)
+
+        # The partition count shouldn't require converting to an rdd
+        mock_dataframe.rdd.getNumPartitions.assert_not_called()
+
+    # Given a wide dataframe. When I select only a few of the columns then the
+    # result shouldn't be coalesced below the default parallelism
+    def test_select_coalesce_keeps_default_parallelism(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.dtypes = mock_dataframe.dtypes + [
+            ('Jet_%d' % i, 'string') for i in range(995)]
+        mock_dataframe2 = self._generate_mock_dataframe()
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
+        mock_dataframe2.coalesce = Mock(return_value=mock_dataframe2)
+
+        a_dataset = SparkDataset("my dataset", mock_dataframe,
+                                 num_partitions=20)
+        a_dataset2 = a_dataset.select_columns(["Electron_pt"])
+
+        # 5 out of 1000 columns would collapse 20 partitions to 1
+        mock_dataframe2.coalesce.assert_called_with(4)
+        self.assertEqual(4, a_dataset2.num_partitions)
+
+    # Given a dataframe with an unknown number of partitions. When I select
+    # columns then the result isn't coalesced
+    def test_select_unknown_partitions(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe2 = self._generate_mock_dataframe()
+        mock_dataframe.selectExpr = Mock(return_value=mock_dataframe2)
+
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+        a_dataset2 = a_dataset.select_columns(["Electron_pt"])
+
+        mock_dataframe2.coalesce.assert_not_called()
+        self.assertEqual(mock_dataframe2, a_dataset2.dataframe)
 
     def test_udf_arguments(self):
         mock_dataframe = self._generate_mock_dataframe()
@@ -172,7 +328,7 @@ class TestSparkDataset(unittest.TestCase):
         a_dataset = SparkDataset("my dataset", mock_dataframe)
         result = a_dataset.udf_arguments(["Electron"])
         self.assertEqual(
-            ['dataset', 'nElectrons', 'Electron_pt', 'Electron_eta'], result)
+            ['nElectrons', 'Electron_pt', 'Electron_eta'], result)
 
     def test_show(self):
         mock_dataframe = self._generate_mock_dataframe()
@@ -180,7 +336,55 @@ class TestSparkDataset(unittest.TestCase):
         a_dataset = SparkDataset("my dataset", mock_dataframe)
         a_dataset.show()
 
-        mock_dataframe.show.assert_called_once()
+        mock_dataframe.show.assert_called_once_with(20)
+
+    def test_show_n(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.show = Mock()
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+        a_dataset.show(5)
+
+        mock_dataframe.show.assert_called_once_with(5)
+
+    def test_summary(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.persist = Mock(return_value=mock_dataframe)
+        mock_dataframe.count = Mock(return_value=42)
+        mock_dataframe.show = Mock()
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+
+        with patch("builtins.print") as mock_print:
+            a_dataset.summary()
+            mock_print.assert_called_with("my dataset", 42)
+
+        mock_dataframe.persist.assert_not_called()
+        mock_dataframe.count.assert_called_once()
+        mock_dataframe.show.assert_called_once_with(20)
+
+    def test_summary_cache(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe.persist = Mock(return_value=mock_dataframe)
+        mock_dataframe.count = Mock(return_value=42)
+        mock_dataframe.show = Mock()
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+
+        with patch("builtins.print"):
+            a_dataset.summary(n=5, cache=True)
+
+        mock_dataframe.persist.assert_called_once()
+        mock_dataframe.count.assert_called_once()
+        mock_dataframe.show.assert_called_once_with(5)
+
+    def test_cache(self):
+        mock_dataframe = self._generate_mock_dataframe()
+        mock_dataframe2 = self._generate_mock_dataframe()
+        mock_dataframe.persist = Mock(return_value=mock_dataframe2)
+        a_dataset = SparkDataset("my dataset", mock_dataframe)
+
+        self.assertEqual(a_dataset, a_dataset.cache())
+        self.assertEqual(mock_dataframe2, a_dataset.dataframe)
+        mock_dataframe.persist.assert_called_with(
+            StorageLevel.MEMORY_AND_DISK)
 
     def test_repartition(self):
         mock_dataframe = self._generate_mock_dataframe()
@@ -189,6 +393,7 @@ class TestSparkDataset(unittest.TestCase):
 
         a_dataset.repartition(42)
         mock_dataframe.repartition.assert_called_with(42)
+        self.assertEqual(42, a_dataset.num_partitions)
 
     def test_execute_udf(self):
         mock_udf_handle = Mock()
@@ -213,7 +418,7 @@ class TestSparkDataset(unittest.TestCase):
 
             mock_udf.assert_called_with(user_func.function, DoubleType(),
                                         PandasUDFType.SCALAR)
-            mock_udf_handle.assert_called_with('dataset', 'Electron_pdgId',
+            mock_udf_handle.assert_called_with('Electron_pdgId',
                                                'Electron_pfRelIso03_all',
                                                'nMuon', 'Muon_pt', 'Muon_eta')
 
@@ -50,6 +50,11 @@ class TestUprootDataset(unittest.TestCase):
         cols = d.columns
         self.assertEqual(["a", "b", "c"], cols)
 
+    def test_columns_with_branches(self):
+        ttree = {b'a': 1, b'b': 2, b'c': 3}
+        d = UprootDataset("foo", ttree, branches=["a", "c"])
+        self.assertEqual(["a", "c"], d.columns)
+
     def test_select_colmns(self):
         ttree = Mock()
         ttree.arrays = Mock(return_value=[1, 2, 3])
@@ -30,9 +30,10 @@ from irishep.datasets.dataset import Dataset
 
 
 class UprootDataset(Dataset):
-    def __init__(self, name, ttree):
+    def __init__(self, name, ttree, branches=None):
         super().__init__(name)
         self.ttree = ttree
+        self.branches = branches
 
     def select_columns(self, columns):
         return AwkwardDataset(self.name, self.ttree.arrays(columns))
@@ -44,11 +45,13 @@ class UprootDataset(Dataset):
     def columns_with_types(self):
         raise NotImplementedError()
 
-    def show(self):
+    def show(self, n=20):
         raise NotImplementedError
 
     @property
     def columns(self):
+        if self.branches is not None:
+            return list(self.branches)
         return [branch.decode("utf-8") for branch in self.ttree.keys()]
 
     def repartition(self, num_partitions):
@@ -29,15 +29,23 @@ from abc import ABCMeta, abstractmethod
 
 
 class Executor(metaclass=ABCMeta):
+    # Number of partitions to spread datasets over. None lets the app choose
+    num_partitions = None
+
     def __init__(self, app_name):
         self.app_name = app_name
 
     @abstractmethod
-    def read_files(self, dataset_name, files):
+    def read_files(self, dataset_name, files, num_partitions=None,
+                   branches=None):
         """
 
         :param dataset_name:
         :param files:
+        :param num_partitions: Number of partitions to spread the dataset
+            over. If None the executor's num_partitions is used
+        :param branches: Optional list of branch names. If provided only these
+            branches are read from the files
         :return:
         """
 
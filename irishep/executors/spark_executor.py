@@ -36,17 +36,37 @@ class SparkExecutor(Executor):
         "nanoAOD": "mytemplate.py"
     }
 
-    def __init__(self, master, app_name, num_partitions):
+    def __init__(self, master, app_name, num_partitions=None,
+                 arrow_enabled=True, arrow_batch_size=65536):
+        """
+        Create a spark session for running the analysis
+        :param master: URL of the spark master
+        :param app_name: Name of the spark application
+        :param num_partitions: Number of partitions to spread datasets over.
+            This is overridden by an explicit num_partitions in the Config. If
+            neither is set, the app chooses a count from the size of the
+            dataset's files, or leaves the partitioning of the files alone
+            if their size can't be determined
+        :param arrow_enabled: Use Arrow to transfer columnar data between
+            the JVM and python (pandas UDFs and toPandas)
+        :param arrow_batch_size: Maximum number of records in each Arrow
+            batch
+        """
         super().__init__(app_name)
         self.spark = SparkSession.builder \
             .master(master) \
             .appName(app_name) \
             .config("spark.jars.packages",
                     "org.diana-hep:spark-root_2.11:0.1.15") \
+            .config("spark.sql.execution.arrow.enabled",
+                    str(arrow_enabled).lower()) \
+            .config("spark.sql.execution.arrow.maxRecordsPerBatch",
+                    str(arrow_batch_size)) \
             .getOrCreate()
         self.num_partitions = num_partitions
 
-    def read_files(self, dataset_name, files):
+    def read_files(self, dataset_name, files, num_partitions=None,
+                   branches=None):
         result_df = None
         # Sparkroot can't handle list of files
         for file in files:
@@ -54,11 +74,26 @@ class SparkExecutor(Executor):
                 .option("tree", "Events") \
                 .load(file)
 
+            # Project right on top of the scan so only the requested branches
+            # are read. Skip any technical columns this file doesn't have.
+            # Other missing branches are left in for spark to report
+            if branches:
+                file_columns = set(file_df.columns)
+                file_df = file_df.select(
+                    [branch for branch in branches
+                     if branch in file_columns or
+                     branch not in SparkDataset.technical_columns])
+
             # So just append each file's datafrane into one big one
             result_df = file_df if not result_df else result_df.union(file_df)
 
-        dataset = SparkDataset(dataset_name, result_df)
-        dataset.repartition(self.num_partitions)
+        # The dataset name column is added as part of the projection in
+        # select_columns rather than as a separate withColumn here
+        dataset = SparkDataset(dataset_name, result_df, add_dataset_col=False)
+
+        num_partitions = num_partitions or self.num_partitions
+        if num_partitions:
+            dataset.repartition(num_partitions)
 
         return dataset
 
@@ -40,6 +40,34 @@ class TestSparkExecutor(unittest.TestCase):
             builder.appName.assert_called_with("foo")
             builder.getOrCreate.assert_called_once()
             self.assertEqual(e.spark, mock_session)
+            self.assertEqual(
+                builder._options["spark.sql.execution.arrow.enabled"],
+                "true")
+            self.assertEqual(
+                builder._options[
+                    "spark.sql.execution.arrow.maxRecordsPerBatch"],
+                "65536")
+
+    def test_init_arrow_options(self):
+        builder = pyspark.sql.session.SparkSession.Builder()
+        mock_session = MagicMock(SparkSession)
+
+        builder.master = Mock(return_value=builder)
+        builder.appName = Mock(return_value=builder)
+        builder.getOrCreate = Mock(return_value=mock_session)
+
+        with patch('pyspark.sql.SparkSession.builder', new=builder):
+            SparkExecutor(app_name="foo", master="spark-master",
+                          num_partitions=42, arrow_enabled=False,
+                          arrow_batch_size=1000)
+
+            self.assertEqual(
+                builder._options["spark.sql.execution.arrow.enabled"],
+                "false")
+            self.assertEqual(
+                builder._options[
+                    "spark.sql.execution.arrow.maxRecordsPerBatch"],
+                "1000")
 
     def test_read_files(self):
         executor = self._construct_exector()
@@ -54,7 +82,7 @@ class TestSparkExecutor(unittest.TestCase):
         # The first dataframe will be union'ed with the second, resulting in a
         # new dataframe
         mock_union_dataframe = Mock(pyspark.sql.DataFrame)
-        mock_union_dataframe.columns = ['dataset', 'a', 'b']
+        mock_union_dataframe.columns = ['a', 'b']
         mock_file_dataframes[0].union = Mock(return_value=mock_union_dataframe)
         mock_union_dataframe.repartition = Mock(
             return_value=mock_union_dataframe)
@@ -79,6 +107,82 @@ class TestSparkExecutor(unittest.TestCase):
         # Verify that the resulting dataframe was repartitioned
         mock_union_dataframe.repartition.assert_called_with(42)
 
+        # The dataset column is left for select_columns to add in the same
+        # projection as the selected columns
+        mock_union_dataframe.withColumn.assert_not_called()
+
+    def test_read_files_num_partitions(self):
+        executor = self._construct_exector()
+
+        mock_file_dataframe = Mock(pyspark.sql.DataFrame)
+        mock_file_dataframe.columns = ['dataset', 'a', 'b']
+        mock_file_dataframe.repartition = Mock(
+            return_value=mock_file_dataframe)
+        executor.spark.read.format = Mock(return_value=executor.spark)
+        executor.spark.option = Mock(return_value=executor.spark)
+        executor.spark.load = Mock(return_value=mock_file_dataframe)
+
+        executor.read_files("mydataset", ["/tmp/foo.root"], num_partitions=7)
+        mock_file_dataframe.repartition.assert_called_with(7)
+
+    def test_read_files_no_partitions(self):
+        builder = pyspark.sql.session.SparkSession.Builder()
+        builder.master = Mock(return_value=builder)
+        builder.appName = Mock(return_value=builder)
+        builder.getOrCreate = Mock(return_value=MagicMock(SparkSession))
+
+        with patch('pyspark.sql.SparkSession.builder', new=builder):
+            executor = SparkExecutor(app_name="foo", master="spark-master")
+
+        mock_file_dataframe = Mock(pyspark.sql.DataFrame)
+        mock_file_dataframe.columns = ['dataset', 'a', 'b']
+        mock_file_dataframe.repartition = Mock()
+        executor.spark.read.format = Mock(return_value=executor.spark)
+        executor.spark.option = Mock(return_value=executor.spark)
+        executor.spark.load = Mock(return_value=mock_file_dataframe)
+
+        # With no partition count anywhere the files keep their partitioning
+        executor.read_files("mydataset", ["root://host//foo.root"])
+        mock_file_dataframe.repartition.assert_not_called()
+
+    def test_read_files_branches(self):
+        executor = self._construct_exector()
+
+        mock_file_dataframe = Mock(pyspark.sql.DataFrame)
+        mock_file_dataframe.columns = ['a', 'b', 'run']
+        mock_projected_dataframe = Mock(pyspark.sql.DataFrame)
+        mock_projected_dataframe.columns = ['dataset', 'a', 'run']
+        mock_projected_dataframe.repartition = Mock(
+            return_value=mock_projected_dataframe)
+        mock_file_dataframe.select = Mock(
+            return_value=mock_projected_dataframe)
+        executor.spark.read.format = Mock(return_value=executor.spark)
+        executor.spark.option = Mock(return_value=executor.spark)
+        executor.spark.load = Mock(return_value=mock_file_dataframe)
+
+        dataset = executor.read_files("mydataset", ["/tmp/foo.root"],
+                                      branches=["a", "run"])
+        mock_file_dataframe.select.assert_called_with(["a", "run"])
+        self.assertEqual(dataset.dataframe, mock_projected_dataframe)
+
+    def test_read_files_branches_missing_technical_columns(self):
+        executor = self._construct_exector()
+
+        mock_file_dataframe = Mock(pyspark.sql.DataFrame)
+        mock_file_dataframe.columns = ['a', 'b', 'run']
+        mock_file_dataframe.select = Mock(
+            return_value=Mock(pyspark.sql.DataFrame))
+        executor.spark.read.format = Mock(return_value=executor.spark)
+        executor.spark.option = Mock(return_value=executor.spark)
+        executor.spark.load = Mock(return_value=mock_file_dataframe)
+
+        # The file has no luminosityBlock or event branches. Requested
+        # branches are kept even if missing so spark can report them
+        executor.read_files("mydataset", ["/tmp/foo.root"],
+                            branches=["a", "c", "run", "luminosityBlock",
+                                      "event"])
+        mock_file_dataframe.select.assert_called_with(["a", "c", "run"])
+
     def test_register_accumulator(self):
         executor = self._construct_exector()
         mock_accumulator = Mock()
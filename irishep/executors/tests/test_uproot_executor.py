@@ -15,16 +15,58 @@ class TestUprootExecutor(unittest.TestCase):
         with patch("uproot.open",
                    return_value={"Events": "test"}) as uproot_mock:
             d = e.read_files("bar", ["/tmp/baz.root"])
-            uproot_mock.assert_called_with("/tmp/baz.root")
+            uproot_mock.assert_called_with(
+                "/tmp/baz.root",
+                xrootdsource={"chunkbytes": 1024 ** 2,
+                              "limitbytes": 25 * 1024 ** 2})
             self.assertEqual("bar", d.name)
             self.assertEqual("test", d.ttree)
 
+    def test_read_files_remote_cache(self):
+        e = UprootExecutor("e", root_cache_size=100, root_chunk_size=10)
+
+        with patch("uproot.open",
+                   return_value={"Events": "test"}) as uproot_mock:
+            e.read_files("bar", ["root://eospublic.cern.ch//eos/baz.root"])
+            uproot_mock.assert_called_with(
+                "root://eospublic.cern.ch//eos/baz.root",
+                xrootdsource={"chunkbytes": 10, "limitbytes": 100})
+
+    def test_read_files_branches(self):
+        e = UprootExecutor("e")
+        ttree = {b"a": 1, b"b": 2, b"run": 3}
+
+        with patch("uproot.open", return_value={"Events": ttree}):
+            d = e.read_files("bar", ["/tmp/baz.root"], branches=["a", "run"])
+            self.assertEqual(["a", "run"], d.branches)
+            self.assertEqual(["a", "run"], d.columns)
+
+    def test_read_files_branches_missing_technical_columns(self):
+        e = UprootExecutor("e")
+        ttree = {b"a": 1, b"b": 2, b"run": 3}
+
+        with patch("uproot.open", return_value={"Events": ttree}):
+            d = e.read_files("bar", ["/tmp/baz.root"],
+                             branches=["a", "run", "luminosityBlock",
+                                       "event"])
+            self.assertEqual(["a", "run"], d.columns)
+
+    def test_read_files_branches_missing(self):
+        e = UprootExecutor("e")
+        ttree = {b"a": 1, b"b": 2, b"run": 3}
+
+        with patch("uproot.open", return_value={"Events": ttree}):
+            with self.assertRaises(ValueError):
+                e.read_files("bar", ["/tmp/baz.root"],
+                             branches=["a", "c", "run"])
+
     def test_read_files_multiple(self):
         e = UprootExecutor("e")
 
         with patch("uproot.open") as uproot_mock:
             e.read_files("bar", ["/tmp/baz.root", "/tmp/bat.root"])
-            uproot_mock.assert_called_with("/tmp/baz.root")
+            uproot_mock.assert_called_with("/tmp/baz.root",
+                                           xrootdsource=e.xrootd_options)
 
     def test_register_accumulator(self):
         e = UprootExecutor("e")
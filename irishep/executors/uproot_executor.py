@@ -49,19 +49,60 @@ class UprootExecutor(Executor):
         "nanoAOD": "uproot_nanoaod.py"
     }
 
-    def __init__(self, app_name):
+    def __init__(self, app_name, root_cache_size=25 * 1024 ** 2,
+                 root_chunk_size=1024 ** 2):
+        """
+        Executor that runs the analysis locally with uproot
+        :param app_name: Name of the application
+        :param root_cache_size: Number of bytes of remote (XRootD) file
+            chunks to keep cached
+        :param root_chunk_size: Size in bytes of each read from a remote
+            file. Larger chunks coalesce many small basket reads into one
+            round trip
+        """
         super().__init__(app_name)
+        self.xrootd_options = {
+            "chunkbytes": root_chunk_size,
+            "limitbytes": root_cache_size
+        }
 
-    def read_files(self, dataset_name, files):
+    def read_files(self, dataset_name, files, num_partitions=None,
+                   branches=None):
         if len(files) > 1:
             print(
                 "WARN: Uproot implementation doesn't work with multiple " +
                 "files in a dataset. Just reading the first file")
 
-        root = uproot.open(files[0])
-        dataset = UprootDataset(dataset_name, root["Events"])
+        root = uproot.open(files[0], xrootdsource=self.xrootd_options)
+        ttree = root["Events"]
+
+        if branches:
+            branches = self._branches_in_tree(ttree, branches)
+
+        dataset = UprootDataset(dataset_name, ttree, branches=branches)
         return dataset
 
+    @staticmethod
+    def _branches_in_tree(ttree, branches):
+        """
+        Limit the requested branches to the ones in the tree. Technical
+        columns the tree doesn't have are skipped, as in the spark executor.
+        Any other missing branch is an error
+        :param ttree: Uproot TTree
+        :param branches: List of requested branch names
+        :return: List of branch names that exist in the tree
+        """
+        tree_branches = {branch.decode("utf-8") for branch in ttree.keys()}
+
+        missing = [branch for branch in branches
+                   if branch not in tree_branches and
+                   branch not in UprootDataset.technical_columns]
+        if missing:
+            raise ValueError(
+                "Branches not found in tree: %s" % ", ".join(missing))
+
+        return [branch for branch in branches if branch in tree_branches]
+
     def register_accumulator(self, initial_value, accumulator):
         return FakeSparkAccumulator(initial_value, accumulator)
 
@@ -12,4 +12,4 @@ def udf({% for col in cols %}{{col}}{{ "," if not loop.last }}{% endfor %}):
             {{column['physics_obj_property']}}={{column['col']}}.array[0].base {{ "," if not loop.last }}{% endfor %})
     {% endfor %}
 
-    return pd.Series(my_analysis.calc(physics_objects, dataset[0]))
+    return pd.Series(my_analysis.calc(physics_objects, {{dataset_name|tojson}}))
@@ -11,4 +11,4 @@ def udf(arrays):
             {{column['physics_obj_property']}}=arrays["{{column['col']}}"].content {{ "," if not loop.last }}{% endfor %})
     {% endfor %}
 
-    return my_analysis.calc(physics_objects, arrays["dataset"][0])
+    return my_analysis.calc(physics_objects, {{dataset_name|tojson}})
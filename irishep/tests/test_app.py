@@ -27,7 +27,7 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import unittest
-from unittest.mock import Mock, MagicMock
+from unittest.mock import Mock, MagicMock, patch
 
 import pyspark.sql
 from pyspark.sql import SparkSession
@@ -105,5 +105,98 @@ class TestApp(unittest.TestCase):
         mock_datasource_manager.get_file_list.assert_called_with("mydataset")
         mock_executor.read_files.assert_called_with("mydataset",
                                                     ["/tmp/foo.root",
-                                                     "/tmp/bar.root"])
+                                                     "/tmp/bar.root"],
+                                                    num_partitions=42,
+                                                    branches=None)
         self.assertEqual(rslt, mock_dataset)
+
+    def test_read_dataset_auto_partitions(self):
+        mock_datasource_manager = Mock(DatasetManager)
+        mock_datasource_manager.provisioned = True
+        mock_datasource_manager.get_file_list = Mock(
+            return_value=["/tmp/foo.root", "/tmp/bar.root"])
+
+        mock_executor = Mock(Executor)
+        mock_executor.num_partitions = None
+        mock_executor.read_files = Mock()
+
+        a = App(Config(
+            executor=mock_executor,
+            dataset_manager=mock_datasource_manager))
+
+        with patch("os.path.isfile", return_value=True), \
+                patch("os.path.getsize", return_value=300 << 20):
+            a.read_dataset("mydataset")
+
+        mock_executor.read_files.assert_called_with("mydataset",
+                                                    ["/tmp/foo.root",
+                                                     "/tmp/bar.root"],
+                                                    num_partitions=4,
+                                                    branches=None)
+
+    def test_read_dataset_executor_partitions(self):
+        mock_datasource_manager = Mock(DatasetManager)
+        mock_datasource_manager.provisioned = True
+        mock_datasource_manager.get_file_list = Mock(
+            return_value=["/tmp/foo.root"])
+
+        mock_executor = Mock(Executor)
+        mock_executor.num_partitions = 20
+        mock_executor.read_files = Mock()
+
+        a = App(Config(
+            executor=mock_executor,
+            dataset_manager=mock_datasource_manager))
+
+        # The executor's partition count should not be overridden by the
+        # size of the files
+        with patch("os.path.isfile", return_value=True), \
+                patch("os.path.getsize", return_value=300 << 20):
+            a.read_dataset("mydataset")
+
+        mock_executor.read_files.assert_called_with("mydataset",
+                                                    ["/tmp/foo.root"],
+                                                    num_partitions=None,
+                                                    branches=None)
+
+    def test_read_dataset_with_columns(self):
+        mock_datasource_manager = Mock(DatasetManager)
+        mock_datasource_manager.provisioned = True
+        mock_datasource_manager.get_file_list = Mock(
+            return_value=["/tmp/foo.root"])
+
+        mock_executor = Mock(Executor)
+        mock_executor.read_files = Mock()
+
+        a = App(Config(
+            executor=mock_executor,
+            num_partitions=42,
+            dataset_manager=mock_datasource_manager))
+
+        a.read_dataset("mydataset", columns=["Electron_pt", "run"])
+        mock_executor.read_files.assert_called_with(
+            "mydataset", ["/tmp/foo.root"], num_partitions=42,
+            branches=["Electron_pt", "run", "luminosityBlock", "event"])
+
+    def test_read_dataset_auto_partitions_small_files(self):
+        with patch("os.path.isfile", return_value=True), \
+                patch("os.path.getsize", return_value=1024):
+            self.assertEqual(1, App._partitions_for_files(["/tmp/foo.root"]))
+
+    def test_read_dataset_auto_partitions_file_uri(self):
+        with patch("os.path.isfile", return_value=True) as mock_isfile, \
+                patch("os.path.getsize", return_value=300 << 20) as mock_size:
+            self.assertEqual(2, App._partitions_for_files(
+                ["file:/data/foo.root"]))
+            mock_isfile.assert_called_with("/data/foo.root")
+            mock_size.assert_called_with("/data/foo.root")
+
+    def test_read_dataset_auto_partitions_xrootd_files(self):
+        with patch("os.path.isfile", return_value=True):
+            self.assertIsNone(App._partitions_for_files(
+                ["/tmp/foo.root", "root://eospublic.cern.ch//eos/foo.root"]))
+
+    def test_read_dataset_auto_partitions_remote_files(self):
+        with patch("os.path.isfile", return_value=False):
+            self.assertIsNone(App._partitions_for_files(
+                ["root://eospublic.cern.ch//eos/foo.root"]))